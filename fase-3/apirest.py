@@ -21,6 +21,9 @@ MODEL_PATHS = [
     "./data/model_lgbm.pkl"
 ]
 
+# Reglas de train.find_invalid_rows usadas para validar los registros de entrada
+VALIDATION_RULES = ("bbox", "distance")
+
 def find_model_path() -> Optional[str]:
     for p in MODEL_PATHS:
         if os.path.exists(p):
@@ -65,12 +68,19 @@ def predict(records: List[Record]):
 
     df = pd.DataFrame(list_dicts)
 
+    # Validación de entrada (mismas reglas vectorizadas de la limpieza de entrenamiento)
+    invalid = train.find_invalid_rows(df, VALIDATION_RULES)
+    if invalid.any(axis=None):
+        errors = [
+            {"index": int(i), "rules": [rule for rule in invalid.columns if row[rule]]}
+            for i, row in invalid[invalid.any(axis=1)].iterrows()
+        ]
+        raise HTTPException(status_code=422, detail={"message": "Registros inválidos", "errors": errors})
+
     # Transformaciones
     try:
-        df = train.add_distance_feature(df)
-        df = train.add_time_features(df)
         weather_df = train.fetch_weather_data()
-        df = train.merge_weather(df, weather_df)
+        df = train.build_features(df, weather_df)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al generar features: {e}")
 
@@ -0,0 +1,309 @@
+"""
+benchmark.py
+-------------
+Benchmark reproducible de los flujos de entrenamiento y predicción.
+
+Genera viajes sintéticos con el esquema de train.zip, usa el proveedor de clima
+sintético (sin red) y mide tiempo y pico de memoria de cada etapa:
+
+    entrenamiento: load_data, clean_data, fetch_weather, build_features, fit
+    predicción:    load_data, fetch_weather, build_features, predict
+
+Cada flujo se ejecuta --warmup veces sin registrar y luego --repeats veces; por
+etapa se guarda la mediana y el mínimo del tiempo y la mediana del incremento del
+pico de memoria residente (RSS, incluye la memoria nativa de LightGBM).
+
+Uso:
+    python benchmark.py run --sizes 10k 1m --repeats 5 --output benchmark.json
+    python benchmark.py compare baseline.json benchmark.json --threshold 0.10
+
+El comando compare compara las medianas y termina con código 1 si alguna etapa
+empeora (tiempo o memoria) más que el umbral indicado, o con código 2 si los
+reportes se generaron con configuraciones distintas (ver META_KEYS).
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import lightgbm
+import train
+from weather import SyntheticWeatherProvider
+
+# =========================================================
+# CONFIGURACIÓN
+# =========================================================
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+DEFAULT_OUTPUT = "./benchmark.json"
+DEFAULT_SIZES = ["10k"]
+DEFAULT_SEED = 42
+DEFAULT_REPEATS = 5
+DEFAULT_WARMUP = 1
+DEFAULT_THRESHOLD = 0.10     # Empeoramiento relativo permitido (10%)
+MIN_SECONDS = 0.05           # Etapas más rápidas se ignoran al comparar tiempos (ruido)
+MIN_PEAK_MB = 10.0           # Picos RSS menores se ignoran al comparar (ruido del asignador)
+GARBAGE_FRACTION = 0.02      # Fracción de filas inválidas (duración/coordenadas)
+
+# malloc_trim de glibc devuelve al sistema la memoria liberada por etapas anteriores,
+# para que el incremento de RSS de cada etapa no quede oculto por memoria reutilizada
+_LIBC = ctypes.CDLL(ctypes.util.find_library("c")) if sys.platform.startswith("linux") else None
+
+# Campos de "meta" que deben coincidir para que dos reportes sean comparables
+META_KEYS = ["python", "pandas", "numpy", "lightgbm", "seed", "low_memory", "cleaning_rules"]
+
+
+# =========================================================
+# GENERADOR DE VIAJES SINTÉTICOS
+# =========================================================
+def generate_trips(n_rows: int, seed: int = DEFAULT_SEED) -> pd.DataFrame:
+    """
+    Genera n_rows viajes con el mismo esquema de train.zip de forma determinista.
+    Incluye una fracción GARBAGE_FRACTION de filas inválidas para ejercitar la limpieza.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(train.START_DATE) + pd.Timedelta(days=1)
+    span = int((pd.Timestamp(train.END_DATE) - start).total_seconds())
+
+    pickup = start + pd.to_timedelta(rng.integers(0, span, n_rows), unit="s")
+    pickup_lat = rng.normal(40.75, 0.03, n_rows)
+    pickup_lon = rng.normal(-73.97, 0.03, n_rows)
+    dropoff_lat = pickup_lat + rng.normal(0.0, 0.02, n_rows)
+    dropoff_lon = pickup_lon + rng.normal(0.0, 0.02, n_rows)
+    distance = train.haversine(pickup_lat, pickup_lon, dropoff_lat, dropoff_lon)
+    duration = (120 + distance * rng.uniform(120, 300, n_rows)).astype(np.int64)
+
+    garbage = rng.random(n_rows) < GARBAGE_FRACTION
+    duration[garbage] = rng.integers(86_400, 10 * 86_400, garbage.sum())
+    pickup_lat[rng.random(n_rows) < GARBAGE_FRACTION] = 0.0
+
+    return pd.DataFrame({
+        "id": "id" + pd.Series(np.arange(n_rows)).astype(str),
+        "vendor_id": rng.integers(1, 3, n_rows),
+        "pickup_datetime": pickup.strftime("%Y-%m-%d %H:%M:%S"),
+        "dropoff_datetime": (pickup + pd.to_timedelta(duration, unit="s")).strftime("%Y-%m-%d %H:%M:%S"),
+        "passenger_count": rng.integers(1, 7, n_rows),
+        "pickup_longitude": pickup_lon,
+        "pickup_latitude": pickup_lat,
+        "dropoff_longitude": dropoff_lon,
+        "dropoff_latitude": dropoff_lat,
+        "store_and_fwd_flag": np.where(rng.random(n_rows) < 0.01, "Y", "N"),
+        "trip_duration": duration,
+    })
+
+
+def write_datasets(n_rows: int, seed: int, directory: str):
+    """Escribe train.zip y test.zip sintéticos en directory y retorna sus rutas."""
+    trips = generate_trips(n_rows, seed)
+    train_path = os.path.join(directory, "train.zip")
+    test_path = os.path.join(directory, "test.zip")
+    trips.to_csv(train_path, index=False, compression="zip")
+    trips.drop(columns=["dropoff_datetime", "trip_duration"]).to_csv(test_path, index=False, compression="zip")
+    return train_path, test_path
+
+
+# =========================================================
+# MEDICIÓN DE ETAPAS
+# =========================================================
+def measure(samples: dict, stage: str, func, *args, **kwargs):
+    """
+    Ejecuta func(*args, **kwargs) y agrega a samples[stage] su tiempo (s) y el
+    incremento del pico de memoria residente (MB) sobre la memoria viva al iniciar
+    la etapa. El tiempo se mide sin instrumentación; si el pico RSS no se puede reiniciar
+    (fuera de Linux) la memoria se registra como None.
+    """
+    gc.collect()
+    if _LIBC is not None:
+        _LIBC.malloc_trim(0)
+    rss_before = train.peak_rss_mb() if train.reset_peak_rss() else None
+    start = time.perf_counter()
+    output = func(*args, **kwargs)
+    seconds = time.perf_counter() - start
+
+    stage_samples = samples.setdefault(stage, {"seconds": [], "peak_mb": []})
+    stage_samples["seconds"].append(seconds)
+    if rss_before is not None:
+        stage_samples["peak_mb"].append(train.peak_rss_mb() - rss_before)
+    return output
+
+
+def summarize(samples: dict) -> dict:
+    """Resume las muestras de cada etapa en mediana/mínimo de tiempo y mediana de memoria."""
+    summary = {}
+    for stage, values in samples.items():
+        peaks = values["peak_mb"]
+        summary[stage] = {
+            "seconds_median": round(float(np.median(values["seconds"])), 4),
+            "seconds_min": round(float(np.min(values["seconds"])), 4),
+            "peak_mb": round(float(np.median(peaks)), 2) if peaks else None,
+            "repeats": len(values["seconds"]),
+        }
+    return summary
+
+
+def bench_train(train_path: str, weather: SyntheticWeatherProvider, low_memory: bool, samples: dict):
+    """Mide las etapas del flujo de entrenamiento (ver train.main) y retorna el modelo."""
+    df = measure(samples, "load_data", train.load_data, train_path)
+    df = measure(samples, "clean_data", train.clean_data, df)
+    weather_df = measure(samples, "fetch_weather", weather.fetch, train.START_DATE, train.END_DATE)
+    df = measure(samples, "build_features", train.build_features, df, weather_df, low_memory=low_memory)
+    X_train, y_train = train.train_split(df)
+    return measure(samples, "fit", train.train_model, X_train, y_train)
+
+
+def bench_predict(model, test_path: str, weather: SyntheticWeatherProvider, low_memory: bool, samples: dict):
+    """Mide las etapas del flujo de predicción (ver predict.main)."""
+    df = measure(samples, "load_data", train.load_data, test_path)
+    weather_df = measure(samples, "fetch_weather", weather.fetch, train.START_DATE, train.END_DATE)
+    df = measure(samples, "build_features", train.build_features, df, weather_df, low_memory=low_memory)
+    measure(samples, "predict", model.predict, df[train.FEATURES])
+
+
+def run(sizes, output: str, seed: int = DEFAULT_SEED, low_memory: bool = train.LOW_MEMORY,
+        repeats: int = DEFAULT_REPEATS, warmup: int = DEFAULT_WARMUP) -> dict:
+    """Ejecuta el benchmark para cada tamaño y guarda los resultados en output (JSON)."""
+    weather = SyntheticWeatherProvider(seed=seed)
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "lightgbm": lightgbm.__version__,
+            "seed": seed,
+            "low_memory": low_memory,
+            "cleaning_rules": list(train.CLEANING_RULES),
+            "repeats": repeats,
+            "warmup": warmup,
+        },
+        "results": {},
+    }
+
+    for size in sizes:
+        print(f"\n=== Benchmark {size} ({SIZES[size]} filas) ===")
+        train_samples, predict_samples = {}, {}
+        with tempfile.TemporaryDirectory() as directory:
+            train_path, test_path = write_datasets(SIZES[size], seed, directory)
+            for i in range(warmup + repeats):
+                # Las primeras 'warmup' ejecuciones se descartan
+                recorded = i >= warmup
+                model = bench_train(train_path, weather, low_memory, train_samples if recorded else {})
+                bench_predict(model, test_path, weather, low_memory, predict_samples if recorded else {})
+        report["results"][size] = {"train": summarize(train_samples), "predict": summarize(predict_samples)}
+
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResultados guardados en: {output}")
+    return report
+
+
+# =========================================================
+# COMPARACIÓN DE RESULTADOS
+# =========================================================
+def check_meta(baseline: dict, current: dict, allow_mismatch: bool = False):
+    """
+    Verifica que los dos reportes se generaron con la misma configuración (META_KEYS).
+    Lanza ValueError si difieren, o solo advierte si allow_mismatch es True.
+    """
+    diffs = [
+        f"{key}: {baseline['meta'].get(key)} != {current['meta'].get(key)}"
+        for key in META_KEYS
+        if baseline["meta"].get(key) != current["meta"].get(key)
+    ]
+    if not diffs:
+        return
+    message = "Los reportes no son comparables (" + "; ".join(diffs) + ")"
+    if not allow_mismatch:
+        raise ValueError(message)
+    print(f"ADVERTENCIA: {message}")
+
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD,
+            allow_mismatch: bool = False) -> list:
+    """
+    Compara dos reportes de benchmark etapa por etapa usando las medianas.
+    Falla si la configuración de los reportes difiere (ver check_meta).
+
+    Retorna:
+        list: regresiones encontradas, cada una como
+              (tamaño, flujo, etapa, métrica, valor_base, valor_actual, cambio_relativo)
+    """
+    check_meta(baseline, current, allow_mismatch)
+    regressions = []
+    minimums = {"seconds_median": MIN_SECONDS, "peak_mb": MIN_PEAK_MB}
+    for size, pipelines in current["results"].items():
+        for pipeline, stages in pipelines.items():
+            for stage, metrics in stages.items():
+                base = baseline["results"].get(size, {}).get(pipeline, {}).get(stage)
+                if base is None:
+                    continue
+                for metric, minimum in minimums.items():
+                    old, new = base.get(metric), metrics.get(metric)
+                    if old is None or new is None or max(old, new) < minimum or old <= 0:
+                        continue
+                    change = (new - old) / old
+                    flag = "REGRESIÓN" if change > threshold else "ok"
+                    print(f"{size:>4} {pipeline:<8} {stage:<15} {metric:<14} "
+                          f"{old:>10.3f} -> {new:>10.3f} ({change:+.1%}) {flag}")
+                    if change > threshold:
+                        regressions.append((size, pipeline, stage, metric, old, new, change))
+    return regressions
+
+
+# =========================================================
+# FUNCIÓN PRINCIPAL
+# =========================================================
+def main(argv=None) -> int:
+    """Interfaz de línea de comandos: subcomandos run y compare."""
+    parser = argparse.ArgumentParser(description="Benchmark de los flujos de entrenamiento y predicción.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Ejecuta el benchmark y guarda los resultados.")
+    run_parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=DEFAULT_SIZES)
+    run_parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    run_parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    run_parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    run_parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    run_parser.add_argument("--low-memory", action="store_true", default=train.LOW_MEMORY)
+
+    compare_parser = subparsers.add_parser("compare", help="Compara dos resultados y marca regresiones.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare_parser.add_argument("--allow-mismatch", action="store_true",
+                                help="Solo advierte si la configuración de los reportes difiere.")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        run(args.sizes, args.output, seed=args.seed, low_memory=args.low_memory,
+            repeats=args.repeats, warmup=args.warmup)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    try:
+        regressions = compare(baseline, current, args.threshold, args.allow_mismatch)
+    except ValueError as e:
+        print(e)
+        return 2
+    print(f"\n{len(regressions)} regresiones por encima de {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+# =========================================================
+# PUNTO DE ENTRADA
+# =========================================================
+if __name__ == "__main__":
+    sys.exit(main())
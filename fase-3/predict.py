@@ -6,11 +6,12 @@ Guarda las predicciones en un archivo submission.csv.
 """
 
 import os
+import numpy as np
 import pandas as pd
 import joblib
 from train import (
-    add_distance_feature, add_time_features,
-    fetch_weather_data, merge_weather, load_data, FEATURES
+    build_features, fetch_weather_data, load_data, track_peak_memory,
+    FEATURES, LOW_MEMORY
 )
 
 # =========================================================
@@ -20,6 +21,11 @@ DATA_PATH = "./data/test.zip"      # Datos de entrada para predicción
 MODEL_PATH = "./data/model_lgbm.pkl"  # Modelo entrenado
 OUTPUT_PATH = "./data/submission.csv"  # Resultado de predicciones
 
+# Control de precisión del modo de bajo consumo: se comparan las predicciones
+# de las primeras CHECK_ROWS filas contra el flujo en float64.
+CHECK_ROWS = 10_000
+PREDICTION_TOLERANCE = 1.0  # Diferencia absoluta media máxima (segundos)
+
 
 # =========================================================
 # FUNCIONES DE PREDICCIÓN
@@ -56,24 +62,53 @@ def make_predictions(model, df: pd.DataFrame) -> pd.DataFrame:
     return df[["id", "trip_duration"]]
 
 
+def check_prediction_drift(reference: np.ndarray, candidate: np.ndarray,
+                           tolerance: float = PREDICTION_TOLERANCE) -> float:
+    """
+    Compara dos conjuntos de predicciones y valida que su diferencia absoluta
+    media no supere la tolerancia.
+
+    Parámetros:
+        reference: predicciones del flujo de referencia (float64)
+        candidate: predicciones del flujo a validar (bajo consumo)
+        tolerance: diferencia absoluta media permitida (segundos)
+
+    Retorna:
+        float: diferencia absoluta media observada
+    """
+    diff = np.abs(np.asarray(reference) - np.asarray(candidate))
+    mean_diff = float(diff.mean())
+    print(f"Diferencia de predicciones: media={mean_diff:.4f}s, máxima={diff.max():.4f}s")
+    if mean_diff > tolerance:
+        raise ValueError(
+            f"Las predicciones cambian más de lo permitido: {mean_diff:.4f}s > {tolerance}s"
+        )
+    return mean_diff
+
+
 # =========================================================
 # FUNCIÓN PRINCIPAL
 # =========================================================
 def main():
     """Ejecuta el proceso de predicción completo."""
-    print("Iniciando predicción...\n")
+    print(f"Iniciando predicción (low_memory={LOW_MEMORY})...\n")
 
-    model = load_model(MODEL_PATH)
-    test_df = load_data(DATA_PATH)
-    print(f"Datos cargados: {test_df.shape}")
+    with track_peak_memory("predicción"):
+        model = load_model(MODEL_PATH)
+        test_df = load_data(DATA_PATH)
+        sample_df = test_df.head(CHECK_ROWS).copy() if LOW_MEMORY else None
 
-    test_df = add_distance_feature(test_df)
-    test_df = add_time_features(test_df)
+        weather_df = fetch_weather_data()
+        test_merged = build_features(test_df, weather_df)
 
-    weather_df = fetch_weather_data()
-    test_merged = merge_weather(test_df, weather_df)
+        submission = make_predictions(model, test_merged)
 
-    submission = make_predictions(model, test_merged)
+    if sample_df is not None:
+        reference = build_features(sample_df, weather_df, low_memory=False)
+        check_prediction_drift(
+            model.predict(reference[FEATURES]),
+            submission["trip_duration"].to_numpy()[:len(reference)]
+        )
 
     print(f"Predicciones generadas: {submission.shape}")
     print(f"Primeras filas:\n{submission.head()}")
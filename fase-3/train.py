@@ -4,31 +4,51 @@ train.py
 Este script entrena un modelo de predicción de duración de viajes en taxi usando LightGBM.
 El flujo es:
 1. Cargar los datos de entrenamiento.
-2. Crear características derivadas (distancia, tiempo, clima).
-3. Entrenar el modelo.
-4. Guardar el modelo entrenado en formato .pkl.
+2. Limpiar filas inválidas (fuera de NYC, duraciones/distancias anómalas, duplicados).
+3. Crear características derivadas (distancia, tiempo, clima).
+4. Entrenar el modelo.
+5. Guardar el modelo entrenado en formato .pkl.
 """
 
 import os
+import sys
+import time
+import resource
+from contextlib import contextmanager
 import numpy as np
 import pandas as pd
 from datetime import datetime
-from meteostat import Point, Hourly
 from lightgbm import LGBMRegressor
 import joblib
+from weather import get_weather_provider
 
 # =========================================================
 # CONFIGURACIÓN GLOBAL
 # =========================================================
 DATA_PATH = "./data/train.zip"  # Ruta del dataset de entrenamiento
 
-# Coordenadas de Nueva York (ubicación de referencia del dataset)
-NYC_COORDS = Point(40.7128, -74.0060)
-
 # Rango de fechas para los datos meteorológicos
+# (la ubicación y el proveedor se configuran en weather.py)
 START_DATE = datetime(2015, 12, 31)
 END_DATE = datetime(2016, 7, 31)
 
+# Modo de bajo consumo de memoria: conserva solo FEATURES con tipos reducidos
+# (float32/uint8) y descarta las columnas intermedias antes del merge.
+# Se activa con la variable de entorno LOW_MEMORY=1.
+LOW_MEMORY = os.getenv("LOW_MEMORY", "0") == "1"
+
+# Reglas de limpieza aplicadas antes de la ingeniería de características
+# (separadas por coma; vacío desactiva la limpieza). Ver clean_data.
+CLEANING_RULES = tuple(
+    rule.strip() for rule in os.getenv("CLEANING_RULES", "bbox,duration,distance,duplicates").split(",")
+    if rule.strip()
+)
+
+# Límites de las reglas de limpieza
+NYC_BBOX = {"lat": (40.49, 40.92), "lon": (-74.27, -73.68)}  # Área de Nueva York
+TRIP_DURATION_RANGE = (30, 6 * 3600)  # Duración válida del viaje (segundos)
+DISTANCE_RANGE_KM = (0.05, 100.0)     # Distancia válida del viaje (km)
+
 
 # =========================================================
 # CARGA DE DATOS
@@ -82,7 +102,10 @@ def haversine(lat1, lon1, lat2, lon2):
 def add_distance_feature(df: pd.DataFrame) -> pd.DataFrame:
     """
     Agrega una nueva columna 'distance_km' calculando la distancia entre punto de recogida y destino.
+    Si la columna ya existe (calculada en la limpieza) no se recalcula.
     """
+    if "distance_km" in df.columns:
+        return df
     df["distance_km"] = haversine(
         df["pickup_latitude"],
         df["pickup_longitude"],
@@ -92,6 +115,66 @@ def add_distance_feature(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+# =========================================================
+# LIMPIEZA DE DATOS
+# =========================================================
+def find_invalid_rows(df: pd.DataFrame, rules=CLEANING_RULES) -> pd.DataFrame:
+    """
+    Evalúa las reglas de limpieza de forma vectorizada.
+
+    Reglas disponibles:
+        bbox       → recogida o destino fuera de NYC_BBOX.
+        duration   → trip_duration fuera de TRIP_DURATION_RANGE (solo si existe la columna).
+        distance   → distancia Haversine fuera de DISTANCE_RANGE_KM.
+        duplicates → fila idéntica a una anterior (ignorando 'id').
+
+    La regla distance agrega la columna 'distance_km' a df para que
+    add_distance_feature no la vuelva a calcular.
+
+    Retorna:
+        pd.DataFrame: una columna booleana por regla (True = fila inválida).
+    """
+    invalid = pd.DataFrame(index=df.index)
+    for rule in rules:
+        if rule == "bbox":
+            (lat_min, lat_max), (lon_min, lon_max) = NYC_BBOX["lat"], NYC_BBOX["lon"]
+            inside = (
+                df["pickup_latitude"].between(lat_min, lat_max)
+                & df["dropoff_latitude"].between(lat_min, lat_max)
+                & df["pickup_longitude"].between(lon_min, lon_max)
+                & df["dropoff_longitude"].between(lon_min, lon_max)
+            )
+            invalid[rule] = ~inside
+        elif rule == "duration":
+            if "trip_duration" in df.columns:
+                invalid[rule] = ~df["trip_duration"].between(*TRIP_DURATION_RANGE)
+        elif rule == "distance":
+            df = add_distance_feature(df)
+            invalid[rule] = ~df["distance_km"].between(*DISTANCE_RANGE_KM)
+        elif rule == "duplicates":
+            invalid[rule] = df.duplicated(subset=[col for col in df.columns if col not in ("id", "distance_km")])
+        else:
+            raise ValueError(f"Regla de limpieza desconocida: {rule}")
+    return invalid
+
+
+def clean_data(df: pd.DataFrame, rules=CLEANING_RULES) -> pd.DataFrame:
+    """
+    Elimina las filas inválidas según las reglas de limpieza (ver find_invalid_rows)
+    e imprime cuántas filas descartó cada regla, en el orden en que se aplican.
+    """
+    invalid = find_invalid_rows(df, rules)
+    dropped = pd.Series(False, index=df.index)
+    for rule in invalid.columns:
+        new_drops = invalid[rule] & ~dropped
+        print(f"Limpieza [{rule}]: {int(new_drops.sum())} filas descartadas")
+        dropped |= new_drops
+
+    df = df.loc[~dropped]
+    print(f"Datos limpios: {df.shape} ({int(dropped.sum())} filas descartadas)")
+    return df
+
+
 # =========================================================
 # CARACTERÍSTICAS TEMPORALES
 # =========================================================
@@ -111,18 +194,31 @@ def add_time_features(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def add_time_features_lean(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Versión de bajo consumo de add_time_features.
+    Solo crea las columnas temporales usadas en FEATURES (como uint8) y la
+    hora truncada necesaria para el merge; elimina pickup_datetime.
+    """
+    pickup = pd.to_datetime(df.pop("pickup_datetime"))
+    df["pickup_day"] = pickup.dt.day.astype(np.uint8)
+    df["pickup_hour"] = pickup.dt.hour.astype(np.uint8)
+    df["pickup_dayofweek"] = pickup.dt.dayofweek.astype(np.uint8)
+    df["pickup_datetime_hour_trunc"] = pickup.dt.floor("h")
+    return df
+
+
 # =========================================================
 # DATOS METEOROLÓGICOS
 # =========================================================
 def fetch_weather_data() -> pd.DataFrame:
     """
-    Descarga datos meteorológicos horarios de Nueva York usando la API de Meteostat.
+    Obtiene datos meteorológicos horarios con el proveedor configurado
+    (WEATHER_PROVIDER: meteostat, file o synthetic; ver weather.py).
     Retorna un DataFrame con variables climáticas (temperatura, precipitación, etc.)
     """
-    print("Descargando datos meteorológicos...")
-    data_hourly = Hourly(NYC_COORDS, START_DATE, END_DATE).fetch()
-    data_hourly = data_hourly.reset_index().rename(columns={"time": "time_ny"})
-    print(f"Datos climáticos descargados: {data_hourly.shape}")
+    data_hourly = get_weather_provider().fetch(START_DATE, END_DATE)
+    print(f"Datos climáticos obtenidos: {data_hourly.shape}")
     return data_hourly
 
 
@@ -135,6 +231,21 @@ def merge_weather(df: pd.DataFrame, weather_df: pd.DataFrame) -> pd.DataFrame:
     return merged
 
 
+def merge_weather_lean(df: pd.DataFrame, weather_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Versión de bajo consumo de merge_weather.
+    Recorta el clima a las columnas de WEATHER_FEATURES antes del merge y
+    elimina las llaves de unión (pickup_datetime_hour_trunc, time_ny) después.
+    """
+    weather = weather_df[["time_ny"] + WEATHER_FEATURES].astype(
+        {col: np.float32 for col in WEATHER_FEATURES}
+    )
+    merged = df.merge(weather, how="left", left_on="pickup_datetime_hour_trunc", right_on="time_ny")
+    merged = merged.drop(columns=["pickup_datetime_hour_trunc", "time_ny"])
+    print(f"Datos combinados: {merged.shape}")
+    return merged
+
+
 # =========================================================
 # SELECCIÓN DE VARIABLES Y ENTRENAMIENTO
 # =========================================================
@@ -144,6 +255,48 @@ FEATURES = [
     "pickup_day", "pickup_hour", "pickup_dayofweek", "temp", "prcp"
 ]
 
+# Variables climáticas usadas por el modelo (subconjunto de FEATURES)
+WEATHER_FEATURES = ["temp", "prcp"]
+
+# Tipos reducidos para cada variable en modo de bajo consumo
+FEATURE_DTYPES = {
+    "passenger_count": np.uint8,
+    "pickup_longitude": np.float32,
+    "pickup_latitude": np.float32,
+    "dropoff_longitude": np.float32,
+    "dropoff_latitude": np.float32,
+    "distance_km": np.float32,
+    "pickup_day": np.uint8,
+    "pickup_hour": np.uint8,
+    "pickup_dayofweek": np.uint8,
+    "temp": np.float32,
+    "prcp": np.float32,
+}
+
+# Columnas no predictoras que se conservan en modo de bajo consumo
+KEEP_COLUMNS = ["id", "trip_duration"]
+
+
+def build_features(df: pd.DataFrame, weather_df: pd.DataFrame, low_memory: bool = LOW_MEMORY) -> pd.DataFrame:
+    """
+    Aplica la ingeniería de características completa (distancia, tiempo y clima).
+
+    En modo low_memory solo se conservan FEATURES (con los tipos de
+    FEATURE_DTYPES) más 'id' / 'trip_duration' si existen.
+    """
+    if not low_memory:
+        df = add_distance_feature(df)
+        df = add_time_features(df)
+        return merge_weather(df, weather_df)
+
+    keep = [col for col in KEEP_COLUMNS if col in df.columns]
+    needed = set(keep + FEATURES + ["pickup_datetime"])
+    df.drop(columns=[col for col in df.columns if col not in needed], inplace=True)
+    df = add_distance_feature(df)
+    df = add_time_features_lean(df)
+    df = merge_weather_lean(df, weather_df)
+    return df[keep + FEATURES].astype(FEATURE_DTYPES)
+
 
 def train_split(df: pd.DataFrame):
     """
@@ -159,28 +312,65 @@ def train_model(X_train, y_train) -> LGBMRegressor:
     Entrena un modelo LightGBM para predecir la duración de los viajes.
     """
     print("Entrenando modelo LightGBM...")
+    start = time.perf_counter()
     model = LGBMRegressor()
     model.fit(X_train, y_train)
-    print("Entrenamiento completado.")
+    print(f"Entrenamiento completado en {time.perf_counter() - start:.2f} s.")
     return model
 
 
+# =========================================================
+# MEDICIÓN DE MEMORIA
+# =========================================================
+def reset_peak_rss() -> bool:
+    """
+    Reinicia el pico de memoria residente (RSS) del proceso.
+    Solo es posible en Linux (/proc/self/clear_refs); retorna False si no se pudo.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    """Retorna el pico de memoria residente (RSS) del proceso en MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+@contextmanager
+def track_peak_memory(label: str):
+    """
+    Reporta el pico de memoria residente (RSS, MB) del proceso al terminar el bloque.
+    Incluye la memoria nativa de LightGBM y no agrega costo de ejecución.
+    Si el pico no se puede reiniciar, se reporta el pico de todo el proceso.
+    """
+    scope = "bloque" if reset_peak_rss() else "proceso"
+    try:
+        yield
+    finally:
+        print(f"Pico de memoria RSS [{label}] ({scope}): {peak_rss_mb():.1f} MB")
+
+
 # =========================================================
 # FUNCIÓN PRINCIPAL
 # =========================================================
 def main():
     """Ejecuta el flujo completo de entrenamiento."""
-    print("Iniciando entrenamiento...\n")
-
-    df = load_data(DATA_PATH)
-    df = add_distance_feature(df)
-    df = add_time_features(df)
+    print(f"Iniciando entrenamiento (low_memory={LOW_MEMORY})...\n")
 
-    weather_df = fetch_weather_data()
-    df = merge_weather(df, weather_df)
+    with track_peak_memory("entrenamiento"):
+        df = load_data(DATA_PATH)
+        df = clean_data(df)
+        weather_df = fetch_weather_data()
+        df = build_features(df, weather_df)
 
-    X_train, y_train = train_split(df)
-    model = train_model(X_train, y_train)
+        X_train, y_train = train_split(df)
+        model = train_model(X_train, y_train)
 
     joblib.dump(model, "./data/model_lgbm.pkl")
     print("Modelo guardado en ./data/model_lgbm.pkl")
@@ -0,0 +1,194 @@
+"""
+weather.py
+-----------
+Proveedores de datos meteorológicos horarios para el flujo de entrenamiento y predicción.
+
+Todos los proveedores retornan un DataFrame con la columna 'time_ny' (hora) y las
+variables climáticas con los nombres de Meteostat ('temp', 'prcp', ...).
+
+Proveedores disponibles:
+1. meteostat → descarga los datos en línea con la API de Meteostat.
+2. file      → lee un archivo .csv local por ubicación; si no existe o no cubre
+                el rango pedido lo genera con Meteostat.
+3. synthetic → genera datos deterministas sin acceso a red (pruebas y benchmarks).
+
+El proveedor se selecciona con variables de entorno (ver get_weather_provider).
+"""
+
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# =========================================================
+# CONFIGURACIÓN
+# =========================================================
+DEFAULT_PROVIDER = "meteostat"
+DEFAULT_LAT = 40.7128     # Nueva York
+DEFAULT_LON = -74.0060
+DEFAULT_CACHE_PATH = "./data/weather_{location}.csv"  # {location}: estación o lat_lon
+DEFAULT_SEED = 42
+
+# Variables generadas por el proveedor sintético (mismos nombres que Meteostat)
+SYNTHETIC_COLUMNS = ["temp", "dwpt", "rhum", "prcp", "wdir", "wspd", "pres"]
+
+
+# =========================================================
+# INTERFAZ
+# =========================================================
+class WeatherProvider(ABC):
+    """Interfaz común de los proveedores de datos meteorológicos."""
+
+    @abstractmethod
+    def fetch(self, start: datetime, end: datetime) -> pd.DataFrame:
+        """
+        Retorna los datos horarios entre start y end (inclusive).
+
+        Retorna:
+            pd.DataFrame: columna 'time_ny' más las variables climáticas.
+        """
+
+
+# =========================================================
+# PROVEEDORES
+# =========================================================
+class MeteostatProvider(WeatherProvider):
+    """
+    Descarga datos horarios con la API de Meteostat.
+    Si se indica 'station' se usa esa estación, si no las coordenadas (lat, lon).
+    """
+
+    def __init__(self, lat: float = DEFAULT_LAT, lon: float = DEFAULT_LON, station: str = None):
+        self.lat = lat
+        self.lon = lon
+        self.station = station
+
+    @property
+    def location(self) -> str:
+        """Identificador de la ubicación (usado para nombrar el archivo de caché)."""
+        return self.station or f"{self.lat:.4f}_{self.lon:.4f}"
+
+    def fetch(self, start: datetime, end: datetime) -> pd.DataFrame:
+        # Import diferido: meteostat solo es necesario para este proveedor
+        from meteostat import Point, Hourly
+
+        location = self.station or Point(self.lat, self.lon)
+        print(f"Descargando datos meteorológicos de Meteostat ({self.location})...")
+        data_hourly = Hourly(location, start, end).fetch()
+        return data_hourly.reset_index().rename(columns={"time": "time_ny"})
+
+
+class CachedFileProvider(WeatherProvider):
+    """
+    Lee los datos desde un archivo .csv local.
+    Si el archivo no existe o no cubre el rango [start, end] y se indica un
+    proveedor 'fallback', descarga los datos con él y los guarda en el archivo
+    para las siguientes ejecuciones; sin 'fallback' se lanza un error.
+    """
+
+    def __init__(self, path: str, fallback: WeatherProvider = None):
+        self.path = path
+        self.fallback = fallback
+
+    def fetch(self, start: datetime, end: datetime) -> pd.DataFrame:
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+
+        if os.path.exists(self.path):
+            print(f"Cargando datos meteorológicos desde: {self.path}")
+            data = pd.read_csv(self.path, parse_dates=["time_ny"])
+            covered = (
+                not data.empty
+                and data["time_ny"].min() <= start.floor("h")
+                and data["time_ny"].max() >= end.floor("h")
+            )
+            if covered:
+                mask = (data["time_ny"] >= start) & (data["time_ny"] <= end)
+                return data.loc[mask].reset_index(drop=True)
+            reason = f"{self.path} no cubre el rango {start} - {end}"
+        else:
+            reason = f"Archivo de clima no encontrado: {self.path}"
+
+        if self.fallback is None:
+            raise FileNotFoundError(reason)
+        print(f"{reason}; se descargan de nuevo.")
+        data = self.fallback.fetch(start, end)
+        data.to_csv(self.path, index=False)
+        print(f"Datos climáticos guardados en: {self.path}")
+        return data
+
+
+class SyntheticWeatherProvider(WeatherProvider):
+    """
+    Genera datos horarios deterministas (misma semilla → mismos datos) con
+    ciclo anual y diario de temperatura y lluvias esporádicas. No usa red.
+    """
+
+    def __init__(self, seed: int = DEFAULT_SEED):
+        self.seed = seed
+
+    def fetch(self, start: datetime, end: datetime) -> pd.DataFrame:
+        print(f"Generando datos meteorológicos sintéticos (seed={self.seed})...")
+        time = pd.date_range(pd.Timestamp(start).floor("h"), pd.Timestamp(end), freq="h")
+        rng = np.random.default_rng(self.seed)
+        n = len(time)
+
+        day_of_year = time.dayofyear.to_numpy()
+        hour = time.hour.to_numpy()
+        temp = (
+            12.0
+            - 12.0 * np.cos(2 * np.pi * (day_of_year - 15) / 365.25)
+            - 4.0 * np.cos(2 * np.pi * (hour - 3) / 24)
+            + rng.normal(0.0, 1.5, n)
+        )
+        rain = rng.random(n) < 0.08
+        prcp = np.where(rain, rng.exponential(1.2, n), 0.0)
+
+        data = pd.DataFrame({
+            "time_ny": time,
+            "temp": temp.round(1),
+            "dwpt": (temp - rng.uniform(2.0, 10.0, n)).round(1),
+            "rhum": rng.uniform(35.0, 95.0, n).round(0),
+            "prcp": prcp.round(1),
+            "wdir": rng.uniform(0.0, 360.0, n).round(0),
+            "wspd": rng.gamma(2.0, 6.0, n).round(1),
+            "pres": rng.normal(1016.0, 7.0, n).round(1),
+        })
+        return data[["time_ny"] + SYNTHETIC_COLUMNS]
+
+
+# =========================================================
+# SELECCIÓN DEL PROVEEDOR
+# =========================================================
+def get_weather_provider(name: str = None) -> WeatherProvider:
+    """
+    Construye el proveedor de clima a partir de las variables de entorno:
+
+        WEATHER_PROVIDER    meteostat | file | synthetic (por defecto: meteostat)
+        WEATHER_LAT         latitud de la ciudad (por defecto: Nueva York)
+        WEATHER_LON         longitud de la ciudad (por defecto: Nueva York)
+        WEATHER_STATION     ID de estación Meteostat (tiene prioridad sobre lat/lon)
+        WEATHER_CACHE_PATH  archivo .csv del proveedor 'file' ('{location}' se
+                            reemplaza por la estación o lat_lon)
+        WEATHER_SEED        semilla del proveedor 'synthetic'
+
+    Parámetros:
+        name (str): nombre del proveedor; si es None se usa WEATHER_PROVIDER.
+    """
+    name = (name or os.getenv("WEATHER_PROVIDER", DEFAULT_PROVIDER)).lower()
+
+    if name == "synthetic":
+        return SyntheticWeatherProvider(seed=int(os.getenv("WEATHER_SEED", DEFAULT_SEED)))
+
+    live = MeteostatProvider(
+        lat=float(os.getenv("WEATHER_LAT", DEFAULT_LAT)),
+        lon=float(os.getenv("WEATHER_LON", DEFAULT_LON)),
+        station=os.getenv("WEATHER_STATION") or None,
+    )
+    if name == "meteostat":
+        return live
+    if name == "file":
+        path = os.getenv("WEATHER_CACHE_PATH", DEFAULT_CACHE_PATH).format(location=live.location)
+        return CachedFileProvider(path, fallback=live)
+
+    raise ValueError(f"Proveedor de clima desconocido: {name} (opciones: meteostat, file, synthetic)")